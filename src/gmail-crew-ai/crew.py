@@ -1,16 +1,137 @@
-from crewai import Agent, Crew, Process, Task, LLM
-from crewai.project import CrewBase, agent, crew, task, before_kickoff
+from crewai import Agent, Crew, Process, Task
+from crewai.project import CrewBase, agent, crew, task, before_kickoff, after_kickoff
 from crewai_tools import FileReadTool
-import json
+import functools
+import hashlib
+import logging
+import orjson
 import os
-from typing import List, Dict, Any, Callable
+import re
+import reprlib
+import uuid
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Optional
 from pydantic import SkipValidation
-from datetime import date, datetime
+from datetime import date
 
 from gmail_crew_ai.tools.gmail_tools import GetUnreadEmailsTool, SaveDraftTool, GmailOrganizeTool, GmailDeleteTool, EmptyTrashTool
-from gmail_crew_ai.tools.slack_tool import SlackNotificationTool
-from gmail_crew_ai.tools.date_tools import DateCalculationTool
-from gmail_crew_ai.models import CategorizedEmail, OrganizedEmail, EmailResponse, SlackNotification, EmailCleanupInfo, SimpleCategorizedEmail, EmailDetails
+from gmail_crew_ai.tools.slack_tools import SlackBatchNotificationTool
+from gmail_crew_ai.llm import RateLimitedLLM
+from gmail_crew_ai.utils import load_fetched_emails
+from gmail_crew_ai.models import CategorizedEmail, OrganizedEmail, EmailResponse, SlackNotification, EmailCleanupInfo, EmailDetails, CategorizedBatch
+
+logger = logging.getLogger(__name__)
+
+# Bounded repr for debug output, so large task outputs are never fully formatted
+_DEBUG_REPR = reprlib.Repr()
+_DEBUG_REPR.maxstring = 100
+_DEBUG_REPR.maxother = 100
+_DEBUG_REPR.maxdict = 10
+_DEBUG_REPR.maxlist = 10
+
+_ISO_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_JSON_BLOCK_RE = re.compile(r'\{.*\}', re.DOTALL)
+_PLACEHOLDER_ANSWER = "my best complete final answer"
+_REQUIRED_CATEGORIZATION_FIELDS = ("email_id", "subject", "category", "priority", "required_action")
+
+# The tools keep no per-run state, so every crew shares a single instance of each
+_FILE_READ_TOOL = FileReadTool()
+
+@functools.lru_cache(maxsize=None)
+def _shared_tool(tool_cls):
+	"""Return the shared instance of a tool, created on first use (after the environment is loaded)."""
+	return tool_cls()
+
+def _write_json_atomic(path: str, data: Any, option: Optional[int] = None) -> None:
+	"""Write data as JSON to a temporary file and rename it into place, so readers never see a partial file."""
+	os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+	tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+	Path(tmp_path).write_bytes(orjson.dumps(data, option=option))
+	os.replace(tmp_path, path)
+
+def run_output_dir(run_id: str) -> str:
+	"""Directory holding all the files of one run."""
+	return os.path.join("output", run_id)
+
+LLM_CACHE_DIR = ".llm_cache"
+PROCESSED_EMAILS_PATH = os.path.join(LLM_CACHE_DIR, "processed_emails.json")
+
+def email_fingerprint(email_detail: Dict[str, Any]) -> str:
+	"""Content hash of an email, used to recognise emails that were already processed."""
+	content = f"{email_detail.get('subject') or ''}{email_detail.get('sender') or ''}{email_detail.get('body') or ''}"
+	return hashlib.sha256(content.encode('utf-8', errors='replace')).hexdigest()
+
+def _load_processed_fingerprints() -> set:
+	"""Load the fingerprints of emails processed by previous runs."""
+	try:
+		return set(orjson.loads(Path(PROCESSED_EMAILS_PATH).read_bytes()))
+	except (OSError, orjson.JSONDecodeError):
+		return set()
+
+def mark_emails_processed(emails: List[Dict[str, Any]]) -> None:
+	"""Remember the given emails so later runs skip re-processing them, and mark them as read in Gmail."""
+	fingerprints = _load_processed_fingerprints()
+	fingerprints.update(email_fingerprint(email_detail) for email_detail in emails)
+	_write_json_atomic(PROCESSED_EMAILS_PATH, sorted(fingerprints))
+	
+	# Otherwise the newest unread emails stay unread and every later run fetches the same ones again
+	try:
+		_shared_tool(GetUnreadEmailsTool).mark_seen([str(e['email_id']) for e in emails if e.get('email_id')])
+	except Exception as e:
+		print(f"Error marking processed emails as read: {e}")
+
+def fetch_emails(email_limit: int, run_id: str) -> List[Dict[str, Any]]:
+	"""
+	Fetch unread emails once, calculate their ages and save them to output/<run_id>/fetched_emails.json.
+	All fetched emails are returned, flagged with already_processed; the file only gets the new ones,
+	so a crew reading it never processes an email twice.
+	"""
+	print(f"Fetching {email_limit} emails...")
+	
+	# Use the GetUnreadEmailsTool directly
+	email_tool = _shared_tool(GetUnreadEmailsTool)
+	email_tuples = email_tool._run(limit=email_limit, max_workers=min(8, email_limit))
+	
+	# Stream the records to a temporary file as they are built, so the whole file is never held in memory
+	emails_path = os.path.join(run_output_dir(run_id), "fetched_emails.json")
+	os.makedirs(run_output_dir(run_id), exist_ok=True)
+	tmp_path = f"{emails_path}.{uuid.uuid4().hex}.tmp"
+	
+	# Convert email tuples to plain EmailDetails dicts with pre-calculated ages
+	emails = []
+	written = 0
+	today = date.today()
+	processed = _load_processed_fingerprints()
+	with open(tmp_path, 'wb') as f:
+		f.write(b'[\n')
+		for email_tuple in email_tuples:
+			email_record = EmailDetails.from_email_tuple_fast(email_tuple)
+			email_date = email_record['date']
+			
+			# Calculate age if date is available; the regex pre-check keeps the common case free of exceptions
+			if email_date and _ISO_DATE_RE.match(email_date):
+				try:
+					email_record['age_days'] = (today - date.fromisoformat(email_date)).days
+					print(f"Email date: {email_date}, age: {email_record['age_days']} days")
+				except ValueError as e:
+					print(f"Error calculating age for email date {email_date}: {e}")
+			elif email_date:
+				print(f"Error calculating age for email date {email_date}: not in YYYY-MM-DD format")
+			
+			email_record['already_processed'] = email_fingerprint(email_record) in processed
+			emails.append(email_record)
+			if email_record['already_processed']:
+				continue
+			if written:
+				f.write(b',\n')
+			f.write(orjson.dumps(email_record, option=orjson.OPT_INDENT_2))
+			written += 1
+		f.write(b'\n]')
+	os.replace(tmp_path, emails_path)
+	
+	print(f"Fetched {len(emails)} emails, saved {written} not yet processed to {emails_path}")
+	
+	return emails
 
 @CrewBase
 class GmailCrewAi():
@@ -19,48 +140,36 @@ class GmailCrewAi():
 	tasks_config = 'config/tasks.yaml'
 
 	@before_kickoff
-	def fetch_emails(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
-		"""Fetch emails before starting the crew and calculate ages."""
-		print("Fetching emails before starting the crew...")
-		
-		# Get the email limit from inputs
-		email_limit = inputs.get('email_limit', 5)
-		print(f"Fetching {email_limit} emails...")
+	def prepare_inputs(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+		"""Write the emails for this kickoff to their own output directory, or fetch emails if none were given."""
+		# Every kickoff writes below its own run directory, so parallel kickoffs never share files
+		run_id = inputs.setdefault('run_id', uuid.uuid4().hex)
 		
-		# Create the output directory if it doesn't exist
-		os.makedirs("output", exist_ok=True)
-		
-		# Use the GetUnreadEmailsTool directly
-		email_tool = GetUnreadEmailsTool()
-		email_tuples = email_tool._run(limit=email_limit)
-		
-		# Convert email tuples to EmailDetails objects with pre-calculated ages
-		emails = []
-		today = date.today()
-		for email_tuple in email_tuples:
-			email_detail = EmailDetails.from_email_tuple(email_tuple)
-			
-			# Calculate age if date is available
-			if email_detail.date:
-				try:
-					email_date_obj = datetime.strptime(email_detail.date, "%Y-%m-%d").date()
-					email_detail.age_days = (today - email_date_obj).days
-					print(f"Email date: {email_detail.date}, age: {email_detail.age_days} days")
-				except Exception as e:
-					print(f"Error calculating age for email date {email_detail.date}: {e}")
-					email_detail.age_days = None
-			
-			emails.append(email_detail.dict())
-		
-		# Save emails to file
-		with open('output/fetched_emails.json', 'w') as f:
-			json.dump(emails, f, indent=2)
-		
-		print(f"Fetched and saved {len(emails)} emails to output/fetched_emails.json")
+		# Batched kickoffs from main.run() carry the pre-fetched emails
+		emails = inputs.pop('emails', None)
+		if emails is None:
+			print("Fetching emails before starting the crew...")
+			fetch_emails(inputs.get('email_limit', 5), run_id)
+			output_dir = run_output_dir(run_id)
+		else:
+			output_dir = os.path.join(run_output_dir(run_id), f"batch_{inputs.get('batch_id', 0)}")
+			_write_json_atomic(os.path.join(output_dir, 'fetched_emails.json'), emails, option=orjson.OPT_INDENT_2)
 		
+		self._output_dir = output_dir
+		inputs['output_dir'] = output_dir
 		return inputs
+
+	@after_kickoff
+	def flush_notifications(self, output):
+		"""Send the Slack notifications still waiting in this crew's batch."""
+		slack_tool = getattr(self, '_slack_tool', None)
+		if slack_tool is not None:
+			print(slack_tool.flush())
+		return output
 	
-	llm = LLM(
+	# Created once with the class and shared by the agents of every crew instance;
+	# its calls go through a process-wide rate limit (OPENAI_MAX_RPM, OPENAI_MAX_CONCURRENCY)
+	llm = RateLimitedLLM(
 		model="openai/gpt-4o-mini",
 		api_key=os.getenv("OPENAI_API_KEY"),
 	)
@@ -70,7 +179,7 @@ class GmailCrewAi():
 		"""The email categorizer agent."""
 		return Agent(
 			config=self.agents_config['categorizer'],
-			tools=[FileReadTool()],
+			tools=[_FILE_READ_TOOL],
 			llm=self.llm,
 		)
 
@@ -79,7 +188,7 @@ class GmailCrewAi():
 		"""The email organization agent."""
 		return Agent(
 			config=self.agents_config['organizer'],
-			tools=[GmailOrganizeTool(), FileReadTool()],
+			tools=[_shared_tool(GmailOrganizeTool), _FILE_READ_TOOL],
 			llm=self.llm,
 		)
 		
@@ -88,16 +197,18 @@ class GmailCrewAi():
 		"""The email response generator agent."""
 		return Agent(
 			config=self.agents_config['response_generator'],
-			tools=[SaveDraftTool()],
+			tools=[_shared_tool(SaveDraftTool)],
 			llm=self.llm,
 		)
 	
 	@agent
 	def notifier(self) -> Agent:
 		"""The email notification agent."""
+		# Each crew batches its own notifications; flush_notifications sends what is left
+		self._slack_tool = SlackBatchNotificationTool()
 		return Agent(
 			config=self.agents_config['notifier'],
-			tools=[SlackNotificationTool()],
+			tools=[self._slack_tool],
 			llm=self.llm,
 		)
 
@@ -106,7 +217,7 @@ class GmailCrewAi():
 		"""The email cleanup agent."""
 		return Agent(
 			config=self.agents_config['cleaner'],
-			tools=[GmailDeleteTool(), EmptyTrashTool()],
+			tools=[_shared_tool(GmailDeleteTool), _shared_tool(EmptyTrashTool)],
 			llm=self.llm,
 		)
 
@@ -115,15 +226,18 @@ class GmailCrewAi():
 		"""The email categorization task."""
 		return Task(
 			config=self.tasks_config['categorization_task'],
-			output_pydantic=SimpleCategorizedEmail
+			output_pydantic=CategorizedBatch
 		)
 	
+	# Organization, response and notification only depend on the categorization, so they
+	# run concurrently once it is done; the (synchronous) cleanup task waits for all of them.
 	@task
 	def organization_task(self) -> Task:
 		"""The email organization task."""
 		return Task(
 			config=self.tasks_config['organization_task'],
 			output_pydantic=OrganizedEmail,
+			async_execution=True,
 		)
 
 	@task
@@ -132,6 +246,7 @@ class GmailCrewAi():
 		return Task(
 			config=self.tasks_config['response_task'],
 			output_pydantic=EmailResponse,
+			async_execution=True,
 		)
 	
 	@task
@@ -140,6 +255,7 @@ class GmailCrewAi():
 		return Task(
 			config=self.tasks_config['notification_task'],
 			output_pydantic=SlackNotification,
+			async_execution=True,
 		)
 
 	@task
@@ -161,108 +277,116 @@ class GmailCrewAi():
 		)
 
 	def _debug_callback(self, event_type, payload):
-		"""Debug callback for crew events."""
+		"""Debug callback for crew events, enabled by setting CREW_DEBUG=1."""
+		if os.getenv("CREW_DEBUG") != "1":
+			return
+		
 		if event_type == "task_start":
-			print(f"DEBUG: Starting task: {payload.get('task_name')}")
+			logger.debug("Starting task: %s", payload.get('task_name'))
 		elif event_type == "task_end":
-			print(f"DEBUG: Finished task: {payload.get('task_name')}")
-			print(f"DEBUG: Task output type: {type(payload.get('output'))}")
+			logger.debug("Finished task: %s", payload.get('task_name'))
+			logger.debug("Task output type: %s", type(payload.get('output')))
 			
-			# Add more detailed output inspection
+			# Add more detailed output inspection; values are truncated while being formatted
 			output = payload.get('output')
 			if output:
 				if isinstance(output, dict):
-					print(f"DEBUG: Output keys: {output.keys()}")
+					logger.debug("Output keys: %s", output.keys())
 					for key, value in output.items():
-						print(f"DEBUG: {key}: {value[:100] if isinstance(value, str) and len(value) > 100 else value}")
+						logger.debug("%s: %s", key, _DEBUG_REPR.repr(value))
 				elif isinstance(output, list):
-					print(f"DEBUG: Output list length: {len(output)}")
+					logger.debug("Output list length: %s", len(output))
 					if output and len(output) > 0:
-						print(f"DEBUG: First item type: {type(output[0])}")
+						logger.debug("First item type: %s", type(output[0]))
 						if isinstance(output[0], dict):
-							print(f"DEBUG: First item keys: {output[0].keys()}")
+							logger.debug("First item keys: %s", output[0].keys())
 				else:
-					print(f"DEBUG: Output: {str(output)[:200]}...")
+					logger.debug("Output: %s...", _DEBUG_REPR.repr(output))
 		elif event_type == "agent_start":
-			print(f"DEBUG: Agent starting: {payload.get('agent_name')}")
+			logger.debug("Agent starting: %s", payload.get('agent_name'))
 		elif event_type == "agent_end":
-			print(f"DEBUG: Agent finished: {payload.get('agent_name')}")
+			logger.debug("Agent finished: %s", payload.get('agent_name'))
 		elif event_type == "error":
-			print(f"DEBUG: Error: {payload.get('error')}")
+			logger.debug("Error: %s", payload.get('error'))
 
 	def _validate_categorization_output(self, output):
 		"""Validate the categorization output before writing to file."""
-		print(f"DEBUG: Validating categorization output: {output}")
+		logger.debug("Validating categorization output: %s", _DEBUG_REPR.repr(output))
+		
+		# If output is already a dict, make sure every categorized entry has the required fields
+		if isinstance(output, dict):
+			items = output.get("items")
+			if not isinstance(items, list):
+				print("WARNING: Output missing the items list, providing an empty one")
+				output["items"] = []
+				return output
+			
+			fetched_emails = None
+			for index, item in enumerate(items):
+				if not isinstance(item, dict):
+					continue
+				is_placeholder = item.get("email_id") == "12345" and item.get("subject") == "Urgent Task Update"
+				# Fast path: a complete, real entry needs no fixing
+				if not is_placeholder and all(field in item for field in _REQUIRED_CATEGORIZATION_FIELDS):
+					continue
+				
+				missing_fields = [field for field in _REQUIRED_CATEGORIZATION_FIELDS if field not in item]
+				if missing_fields:
+					print(f"WARNING: Entry {index} missing required fields: {missing_fields}")
+					# Add missing fields with empty values
+					for field in missing_fields:
+						item[field] = ""
+				
+				# Check if the values match the expected format
+				if is_placeholder:
+					print(f"WARNING: Entry {index} contains placeholder values, trying to fix")
+					# Entries are in the order of the fetched emails, so take the real ID from there
+					try:
+						if fetched_emails is None:
+							emails_path = os.path.join(getattr(self, '_output_dir', "output"), "fetched_emails.json")
+							fetched_emails = load_fetched_emails(emails_path)
+						if index < len(fetched_emails):
+							real_email = fetched_emails[index]
+							item["email_id"] = real_email.get("email_id", "")
+							item["subject"] = real_email.get("subject", "")
+					except Exception as e:
+						print(f"WARNING: Failed to fix placeholder values: {e}")
+			
+			return output
 		
 		# If output is empty or invalid, provide a default
 		if not output:
 			print("WARNING: Empty categorization output, providing default")
-			return {
-				"email_id": "",
-				"subject": "",
-				"category": "",
-				"priority": "",
-				"required_action": ""
-			}
+			return {"items": []}
 		
 		# If output is a string (which might happen if the LLM returns JSON as a string)
 		if isinstance(output, str):
 			try:
 				# Try to parse it as JSON
-				import json
 				# First, check if the string starts with "my best complete final answer"
-				if "my best complete final answer" in output.lower():
+				if _PLACEHOLDER_ANSWER in output[:64].lower():
 					# Extract the JSON part
-					json_start = output.find("{")
-					json_end = output.rfind("}") + 1
-					if json_start >= 0 and json_end > json_start:
-						json_str = output[json_start:json_end]
-						parsed = json.loads(json_str)
+					match = _JSON_BLOCK_RE.search(output)
+					if match:
+						parsed = orjson.loads(match.group(0))
 						print("DEBUG: Successfully extracted and parsed JSON from answer")
 						return parsed
 				
 				# Try to parse the whole string as JSON
-				parsed = json.loads(output)
+				parsed = orjson.loads(output)
 				print("DEBUG: Successfully parsed string output as JSON")
 				return parsed
 			except Exception as e:
 				print(f"WARNING: Output is a string but not valid JSON: {e}")
 				# Try to extract anything that looks like JSON
-				import re
-				json_pattern = r'\{.*\}'
-				match = re.search(json_pattern, output, re.DOTALL)
+				match = _JSON_BLOCK_RE.search(output)
 				if match:
 					try:
 						json_str = match.group(0)
-						parsed = json.loads(json_str)
+						parsed = orjson.loads(json_str)
 						print("DEBUG: Successfully extracted and parsed JSON using regex")
 						return parsed
 					except:
 						print("WARNING: Failed to parse extracted JSON")
 		
-		# If output is already a dict, make sure it has the required fields
-		if isinstance(output, dict):
-			required_fields = ["email_id", "subject", "category", "priority", "required_action"]
-			missing_fields = [field for field in required_fields if field not in output]
-			
-			if missing_fields:
-				print(f"WARNING: Output missing required fields: {missing_fields}")
-				# Add missing fields with empty values
-				for field in missing_fields:
-					output[field] = ""
-			
-			# Check if the values match the expected format
-			if output.get("email_id") == "12345" and output.get("subject") == "Urgent Task Update":
-				print("WARNING: Output contains placeholder values, trying to fix")
-				# Try to get the real email ID from the fetched emails
-				try:
-					with open("output/fetched_emails.json", "r") as f:
-						fetched_emails = json.load(f)
-						if fetched_emails and len(fetched_emails) > 0:
-							real_email = fetched_emails[0]
-							output["email_id"] = real_email.get("email_id", "")
-							output["subject"] = real_email.get("subject", "")
-				except Exception as e:
-					print(f"WARNING: Failed to fix placeholder values: {e}")
-		
-		return output
\ No newline at end of file
+		return output
@@ -0,0 +1,49 @@
+import functools
+import os
+import threading
+import time
+from crewai import LLM
+
+class RateLimiter:
+    """Limits how many LLM requests run at once and how many start per minute."""
+
+    def __init__(self, max_rpm: int, max_concurrency: int):
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._interval = 60.0 / max_rpm if max_rpm > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self):
+        """Wait for a free concurrency slot and for the next request slot in the per-minute budget."""
+        self._semaphore.acquire()
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def release(self):
+        """Free the concurrency slot taken by acquire()."""
+        self._semaphore.release()
+
+@functools.lru_cache(maxsize=None)
+def shared_rate_limiter() -> RateLimiter:
+    """The process-wide limiter, read from OPENAI_MAX_RPM and OPENAI_MAX_CONCURRENCY on first use."""
+    return RateLimiter(
+        max_rpm=int(os.getenv("OPENAI_MAX_RPM", "500")),
+        max_concurrency=max(1, int(os.getenv("OPENAI_MAX_CONCURRENCY", "4"))),
+    )
+
+class RateLimitedLLM(LLM):
+    """LLM whose calls share one rate limit across all concurrently running crews."""
+
+    def call(self, *args, **kwargs):
+        limiter = shared_rate_limiter()
+        limiter.acquire()
+        try:
+            return super().call(*args, **kwargs)
+        finally:
+            limiter.release()
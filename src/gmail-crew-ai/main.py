@@ -1,7 +1,13 @@
 #!/usr/bin/env python
+import asyncio
+import logging
+import os
 import sys
+import uuid
 import warnings
 from dotenv import load_dotenv
+import litellm
+from litellm.caching import Cache
 
 # Remove or comment out these debug lines
 # import litellm
@@ -12,7 +18,25 @@ warnings.filterwarnings("ignore", message=".*not a Python type.*")
 # Keep your existing warning filter
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
-from gmail_crew_ai.crew import GmailCrewAi
+from gmail_crew_ai.crew import GmailCrewAi, fetch_emails, mark_emails_processed, run_output_dir, LLM_CACHE_DIR
+
+async def _kickoff_all(inputs_list, max_parallel_agents):
+    """Kick off one crew per input, running at most max_parallel_agents at a time.
+
+    A failed batch does not cancel the others; its exception is returned in place of its result.
+    """
+    semaphore = asyncio.Semaphore(max_parallel_agents)
+    
+    async def _kickoff(inputs):
+        emails = inputs['emails']
+        async with semaphore:
+            # Each kickoff gets its own crew so tasks and agents are never shared between runs
+            result = await GmailCrewAi().crew().kickoff_async(inputs=inputs)
+        mark_emails_processed(emails)
+        return result
+    
+    # Let every batch finish so each one that succeeds is marked as processed
+    return await asyncio.gather(*(_kickoff(inputs) for inputs in inputs_list), return_exceptions=True)
 
 def run():
     """Run the Gmail Crew AI."""
@@ -20,6 +44,14 @@ def run():
         # Load environment variables
         load_dotenv()
         
+        # Show the crew's debug output only when asked for
+        if os.getenv("CREW_DEBUG") == "1":
+            logging.basicConfig(format="%(levelname)s: %(message)s")
+            logging.getLogger("gmail_crew_ai").setLevel(logging.DEBUG)
+        
+        # Cache LLM responses on disk so identical prompts are not sent twice
+        litellm.cache = Cache(type="disk", disk_cache_dir=LLM_CACHE_DIR)
+        
         # Get user input for number of emails to process
         try:
             email_limit = input("How many emails would you like to process? (default: 5): ")
@@ -36,8 +68,36 @@ def run():
         
         print(f"Processing {email_limit} emails...")
         
-        # Create and run the crew with the specified email limit
-        result = GmailCrewAi().crew().kickoff(inputs={'email_limit': email_limit})
+        # Fetch the emails once, then run an independent pipeline per batch
+        run_id = uuid.uuid4().hex
+        emails = fetch_emails(email_limit, run_id)
+        if not emails:
+            print("\nNo emails were processed. Inbox might be empty.")
+            return 0
+        
+        # Skip emails that a previous run already processed
+        emails = [email for email in emails if not email.get('already_processed')]
+        if not emails:
+            print("\nAll fetched emails were already processed by a previous run.")
+            return 0
+        
+        # Categorize emails in batches so each batch costs a single categorization call
+        batch_size = max(1, int(os.getenv("EMAIL_BATCH_SIZE", "10")))
+        max_parallel_agents = int(os.getenv("MAX_PARALLEL_AGENTS", "3"))
+        inputs_list = [
+            {'email_limit': len(batch), 'run_id': run_id, 'batch_id': str(i), 'emails': batch}
+            for i, batch in enumerate(emails[start:start + batch_size] for start in range(0, len(emails), batch_size))
+        ]
+        results = asyncio.run(_kickoff_all(inputs_list, max(1, max_parallel_agents)))
+        
+        # Report the batches that failed; the others were already marked as processed
+        failures = [(inputs['batch_id'], r) for inputs, r in zip(inputs_list, results) if isinstance(r, BaseException)]
+        for batch_id, error in failures:
+            print(f"\nError in batch {batch_id}: {error}")
+        if failures:
+            print(f"\n{len(failures)} of {len(results)} batches failed; their emails will be retried on the next run.")
+            return 1
+        result = results
         
         # Check if result is empty or None
         if not result:
@@ -47,7 +107,7 @@ def run():
         # Print the result in a clean way
         if result:
             print("\nCrew execution completed successfully! 🎉")
-            print("Results have been saved to the output directory.")
+            print(f"Results have been saved to {run_output_dir(run_id)}.")
             return 0  # Return success code
         else:
             print("\nCrew execution completed but no results were returned.")
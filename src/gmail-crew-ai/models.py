@@ -14,28 +14,36 @@ class EmailDetails(BaseModel):
     is_part_of_thread: Optional[bool] = Field(False, description="Whether this email is part of a thread")
     thread_size: Optional[int] = Field(1, description="Number of emails in this thread")
     thread_position: Optional[int] = Field(1, description="Position of this email in the thread (1 = first)")
+    already_processed: Optional[bool] = Field(False, description="Whether a previous run already processed this email")
+
+    @staticmethod
+    def from_email_tuple_fast(email_tuple) -> Dict[str, Any]:
+        """Build the fields of an EmailDetails from an email tuple as a plain dict, without validation."""
+        if not email_tuple or len(email_tuple) < 5:
+            subject = sender = body = email_id = thread_info = date = None
+        else:
+            subject, sender, body, email_id, thread_info = email_tuple
+            # Extract date from thread_info
+            date = thread_info.get('date', '') if type(thread_info) is dict else ''
+        
+        return {
+            'email_id': email_id,
+            'subject': subject,
+            'sender': sender,
+            'body': body,
+            'date': date,
+            'age_days': None,
+            'thread_info': thread_info,
+            'is_part_of_thread': False,
+            'thread_size': 1,
+            'thread_position': 1,
+            'already_processed': False,
+        }
 
     @classmethod
     def from_email_tuple(cls, email_tuple):
         """Create an EmailDetails from an email tuple."""
-        if not email_tuple or len(email_tuple) < 5:
-            return cls(email_id=None, subject=None)
-        
-        subject, sender, body, email_id, thread_info = email_tuple
-        
-        # Extract date from thread_info
-        date = ""
-        if isinstance(thread_info, dict) and 'date' in thread_info:
-            date = thread_info['date']
-            
-        return cls(
-            email_id=email_id,
-            subject=subject,
-            sender=sender,
-            body=body,
-            date=date,
-            thread_info=thread_info
-        )
+        return cls(**cls.from_email_tuple_fast(email_tuple))
 
 # Define the valid categories, priorities, and actions as type aliases
 EmailCategoryType = Literal["NEWSLETTERS", "PROMOTIONS", "PERSONAL", "GITHUB", 
@@ -132,4 +140,8 @@ class SimpleCategorizedEmail(BaseModel):
             subject=subject,
             sender=sender,
             date=date
-        )
\ No newline at end of file
+        )
+
+class CategorizedBatch(BaseModel):
+    """Model for the categorization of a whole batch of emails in a single answer."""
+    items: List[SimpleCategorizedEmail] = Field(default_factory=list, description="One categorized entry per email in the batch")
@@ -1,9 +1,12 @@
 import imaplib
 import email
 from email.header import decode_header
-from typing import List, Tuple, Literal, Optional, Type, Dict, Any
+from email.parser import BytesHeaderParser
+from typing import List, Tuple, Literal, Optional, Type, Dict, Any, ClassVar
 import re
-from bs4 import BeautifulSoup
+import html
+from bs4 import BeautifulSoup, FeatureNotFound
+from selectolax.parser import HTMLParser
 from crewai.tools import BaseTool
 import os
 from pydantic import BaseModel, Field
@@ -12,6 +15,43 @@ import time
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import base64
+import atexit
+import functools
+from datetime import datetime
+import threading
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+_WS_RE = re.compile(r'\s+')
+# Only tag-shaped text: a '<' followed by a name, '/', '!' or '?', so 'a < b' is left alone
+_TAG_RE = re.compile(r'<[A-Za-z/!?][^>]*>')
+_TZNAME_RE = re.compile(r'\s+\([A-Z]{3,4}\)')
+_EMAIL_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S %z"
+
+# HTML bodies shorter than this (and without script/style) are cleaned with _TAG_RE
+_SIMPLE_HTML_MAX_LENGTH = 2048
+
+# UID data item in a FETCH response, and the section a literal of it belongs to
+_FETCH_UID_RE = re.compile(rb'UID (\d+)')
+_FETCH_SECTION_RE = re.compile(rb'BODY\[([A-Z.]*)\]')
+# Order in which the literals of one message are joined; IMAP does not fix the order of FETCH items
+_SECTION_ORDER = {b"HEADER": 0, b"TEXT": 1}
+
+# Maximum number of messages requested by a single IMAP FETCH
+_FETCH_BATCH_SIZE = 100
+
+# so fetching does not mark unread emails as read; mark_seen does that once they are processed
+# so fetching does not mark unread emails as read
+_FETCH_MESSAGE_ITEMS = "(BODY.PEEK[HEADER] BODY.PEEK[TEXT])"
+
+# Maximum number of Message-IDs OR-ed together in a single thread UID SEARCH
+_THREAD_SEARCH_BATCH_SIZE = 50
+
+# UIDPLUS response code identifying the message stored by an APPEND
+_APPENDUID_RE = re.compile(rb'APPENDUID (\d+) (\d+)')
+
+# Signature placeholder left in drafts by the response writer
+_SIG_RE = re.compile(r'\[your name\]', re.IGNORECASE)
 
 def decode_header_safe(header):
     """
@@ -20,6 +60,19 @@ def decode_header_safe(header):
     if not header:
         return ""
     
+    if isinstance(header, str):
+        # Plain headers have no RFC 2047 encoded words and decode to themselves
+        if '=?' not in header:
+            return header
+        return _decode_header_cached(header)
+    return _decode_header(header)
+
+@functools.lru_cache(maxsize=4096)
+def _decode_header_cached(header: str) -> str:
+    """Memoized _decode_header for string headers; senders repeat a lot within a run."""
+    return _decode_header(header)
+
+def _decode_header(header) -> str:
     try:
         decoded_parts = []
         for decoded_str, charset in decode_header(header):
@@ -35,21 +88,156 @@ def decode_header_safe(header):
         # Fallback to raw header if decoding fails
         return str(header)
 
-def clean_email_body(email_body: str) -> str:
+def _html_to_text_bs4(email_body: str) -> str:
+    """Extract the text of an HTML document with BeautifulSoup."""
+    try:
+        # The C-based lxml parser is much faster than the pure-Python html.parser
+        soup = BeautifulSoup(email_body, "lxml")
+    except FeatureNotFound:
+        soup = BeautifulSoup(email_body, "html.parser")
+    return soup.get_text(separator=" ")  # Get text with spaces instead of <br/>
+
+def clean_email_body(email_body: str, content_type: str = "text/html") -> str:
     """
     Clean the email body by removing HTML tags and excessive whitespace.
     """
+    # Short HTML bodies without scripts or styles are simple enough to strip the tags with a
+    # regex; plain text always goes to the parser, since its '<' and '>' are rarely tags
+    if content_type == "text/html" and len(email_body) < _SIMPLE_HTML_MAX_LENGTH:
+        lowered = email_body.lower()
+        if '<script' not in lowered and '<style' not in lowered:
+            text = html.unescape(_TAG_RE.sub(' ', email_body))
+            return _WS_RE.sub(' ', text).strip()
+
     try:
-        soup = BeautifulSoup(email_body, "html.parser")
-        text = soup.get_text(separator=" ")  # Get text with spaces instead of <br/>
-    except Exception as e:
-        print(f"Error parsing HTML: {e}")
-        text = email_body  # Fallback to raw body if parsing fails
+        # selectolax extracts the text in C without building a Python object per node
+        tree = HTMLParser(email_body)
+        tree.strip_tags(["script", "style"])
+        text = tree.body.text(separator=" ") if tree.body else ""
+    except Exception:
+        try:
+            text = _html_to_text_bs4(email_body)
+        except Exception as e:
+            print(f"Error parsing HTML: {e}")
+            text = email_body  # Fallback to raw body if parsing fails
 
     # Remove excessive whitespace and newlines
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _WS_RE.sub(' ', text).strip()
     return text
 
+_header_parser = BytesHeaderParser()
+
+def _parse_message(raw_message: bytes):
+    """
+    Parse a fetched message. Single-part messages only get their header parsed, with the
+    text attached as the raw payload; multipart ones still need the full MIME tree.
+    """
+    header_bytes, separator, text_bytes = raw_message.partition(b"\r\n\r\n")
+    if not separator:
+        header_bytes, separator, text_bytes = raw_message.partition(b"\n\n")
+    msg = _header_parser.parsebytes(header_bytes + separator)
+    if msg.get_content_maintype() == "multipart":
+        return email.message_from_bytes(raw_message)
+    # Stored the way the parser stores bodies, so get_payload(decode=True) behaves the same
+    msg.set_payload(text_bytes.decode("ascii", "surrogateescape"))
+    return msg
+
+def _split_fetch_response(msg_data) -> Dict[bytes, bytes]:
+    """
+    Split the response of a multi-message FETCH into the raw bytes of each message, keyed by UID
+    (which a UID FETCH always returns), or by sequence number when the response has no UID.
+    Each message starts with a (b'<seq> (<item> {size}', data) tuple; further literals of the same
+    message follow as tuples without a leading sequence number, and b')' closes the message.
+    The literals are joined header first, whatever order the server sent them in.
+    """
+    parts_by_seq: Dict[bytes, List[Tuple[int, bytes]]] = {}
+    uid_by_seq = {}
+    current_seq = None
+    for item in msg_data:
+        prefix, literal = item if isinstance(item, tuple) else (item, None)
+        if not isinstance(prefix, bytes):
+            continue
+        token = prefix.split(None, 1)[0] if prefix else b""
+        if token.isdigit():
+            current_seq = token
+        if current_seq is None:
+            continue
+        # The UID item can come before the literals or after them, with the closing parenthesis
+        match = _FETCH_UID_RE.search(prefix)
+        if match:
+            uid_by_seq[current_seq] = match.group(1)
+        if literal is not None:
+            section = _FETCH_SECTION_RE.search(prefix)
+            rank = _SECTION_ORDER.get(section.group(1), len(_SECTION_ORDER)) if section else len(_SECTION_ORDER)
+            parts_by_seq.setdefault(current_seq, []).append((rank, literal))
+    # sorted() is stable, so literals of unknown sections keep the order they arrived in
+    return {
+        uid_by_seq.get(seq, seq): b"".join(literal for _, literal in sorted(parts, key=lambda part: part[0]))
+        for seq, parts in parts_by_seq.items()
+    }
+
+# Idle, logged-in IMAP connections per account, reused across tool calls instead of logging in every time
+_pool_lock = threading.Lock()
+_pool: Dict[str, List[Tuple["PooledImapConn", float]]] = {}
+# Gmail allows 15 simultaneous IMAP connections per account; keep fewer than that idle
+_IMAP_POOL_SIZE = 8
+# Socket timeout in seconds, so a hung connection fails instead of stalling the crew run
+_IMAP_TIMEOUT = 30
+# Gmail drops connections that stay idle for about 30 minutes, so older ones are not reused
+_IMAP_IDLE_TIMEOUT = 25 * 60
+
+class PooledImapConn:
+    """
+    Thin proxy around a logged-in IMAP4_SSL connection that remembers the selected mailbox,
+    so selecting the same mailbox again (as every tool does with INBOX) costs no round trip.
+    All other commands are passed through.
+    """
+
+    def __init__(self, mail: imaplib.IMAP4_SSL):
+        self._real = mail
+        # (mailbox, readonly) currently selected, and the SELECT response data for it
+        self.current_folder: Optional[Tuple[str, bool]] = None
+        self._select_data = None
+
+    def select(self, mailbox: str = "INBOX", readonly: bool = False):
+        if self.current_folder == (mailbox, readonly):
+            # A real SELECT starts from a clean slate; drop the EXISTS/FETCH responses left over
+            # from earlier commands so the next fetch does not return them first
+            self._real.untagged_responses.clear()
+            return "OK", self._select_data
+        self.current_folder = None
+        result, data = self._real.select(mailbox, readonly)
+        if result == "OK":
+            self.current_folder, self._select_data = (mailbox, readonly), data
+        return result, data
+
+    def close(self):
+        self.current_folder = None
+        return self._real.close()
+
+    def logout(self):
+        self.current_folder = None
+        return self._real.logout()
+
+    def __getattr__(self, name: str):
+        return getattr(self._real, name)
+
+def _logout_quietly(mail):
+    """Log out of a connection that is no longer needed, ignoring errors."""
+    try:
+        mail.logout()
+    except Exception:
+        pass
+
+@atexit.register
+def _close_pooled_connections():
+    """Log out of all pooled connections when the process exits."""
+    with _pool_lock:
+        connections = [mail for idle in _pool.values() for mail, _ in idle]
+        _pool.clear()
+    for mail in connections:
+        _logout_quietly(mail)
+
 class GmailToolBase(BaseTool):
     """Base class for Gmail tools, handling connection and credentials."""
     
@@ -59,81 +247,144 @@ class GmailToolBase(BaseTool):
     email_address: Optional[str] = Field(None, description="Gmail email address")
     app_password: Optional[str] = Field(None, description="Gmail app password")
 
-    def __init__(self, description: str = ""):
-        super().__init__(description=description)
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
         self.email_address = os.environ.get("EMAIL_ADDRESS")
         self.app_password = os.environ.get("APP_PASSWORD")
 
         if not self.email_address or not self.app_password:
             raise ValueError("EMAIL_ADDRESS and APP_PASSWORD must be set in the environment.")
 
+    def _new_connection(self):
+        """Open and log in a new connection to Gmail."""
+        print(f"Connecting to Gmail with email: {self.email_address[:3]}...{self.email_address[-8:]}")
+        mail = imaplib.IMAP4_SSL("imap.gmail.com", timeout=_IMAP_TIMEOUT)
+        # IMAP is many small commands: don't let Nagle hold them back, and keep pooled
+        # connections alive through NAT while they sit idle
+        mail.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        mail.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        mail.login(self.email_address, self.app_password)
+        print("Successfully logged in to Gmail")
+        return PooledImapConn(mail)
+
     def _connect(self):
-        """Connect to Gmail."""
-        try:
-            print(f"Connecting to Gmail with email: {self.email_address[:3]}...{self.email_address[-8:]}")
-            mail = imaplib.IMAP4_SSL("imap.gmail.com")
-            mail.login(self.email_address, self.app_password)
-            print("Successfully logged in to Gmail")
+        """Connect to Gmail, reusing an idle pooled connection when there is one."""
+        now = time.monotonic()
+        stale = []
+        mail = None
+        with _pool_lock:
+            idle = _pool.get(self.email_address, [])
+            while idle:
+                candidate, last_used = idle.pop()
+                if now - last_used < _IMAP_IDLE_TIMEOUT:
+                    mail = candidate
+                    break
+                stale.append(candidate)
+        for candidate in stale:
+            _logout_quietly(candidate)
+        if mail is not None:
             return mail
+
+        try:
+            return self._new_connection()
         except Exception as e:
             print(f"Error connecting to Gmail: {e}")
             raise e
 
     def _disconnect(self, mail):
-        """Disconnect from Gmail."""
+        """Return the connection to the pool, or drop it if it is no longer usable."""
         try:
-            mail.close()
-            mail.logout()
-            print("Successfully disconnected from Gmail")
-        except:
-            pass
-
-    def _get_thread_messages(self, mail: imaplib.IMAP4_SSL, msg) -> List[str]:
-        """Get all messages in the thread by following References and In-Reply-To headers."""
-        thread_messages = []
-        
-        # Get message IDs from References and In-Reply-To headers
+            # A cheap round trip that tells whether the connection is still alive
+            mail.noop()
+        except (imaplib.IMAP4.error, OSError):
+            # IMAP4.abort is a subclass of IMAP4.error
+            _logout_quietly(mail)
+            return
+
+        with _pool_lock:
+            idle = _pool.setdefault(self.email_address, [])
+            if len(idle) < _IMAP_POOL_SIZE:
+                idle.append((mail, time.monotonic()))
+                return
+        _logout_quietly(mail)
+
+    @staticmethod
+    def _referenced_message_ids(msg) -> List[str]:
+        """Message-IDs from the References and In-Reply-To headers, in thread order."""
         references = msg.get("References", "").split()
         in_reply_to = msg.get("In-Reply-To", "").split()
-        message_ids = list(set(references + in_reply_to))  # Remove duplicates
-        
-        if message_ids:
-            # Search for messages with these Message-IDs
-            search_criteria = ' OR '.join(f'HEADER MESSAGE-ID "{mid}"' for mid in message_ids)
-            result, data = mail.search(None, search_criteria)
-            
-            if result == "OK":
-                thread_ids = data[0].split()
-                for thread_id in thread_ids:
-                    result, msg_data = mail.fetch(thread_id, "(RFC822)")
-                    if result == "OK":
-                        thread_msg = email.message_from_bytes(msg_data[0][1])
-                        # Extract body from thread message
-                        thread_body = self._extract_body(thread_msg)
-                        thread_messages.append(thread_body)
-        
-        return thread_messages
+        return list(dict.fromkeys(references + in_reply_to))  # Remove duplicates
+
+    def _fetch_thread_bodies(self, mail: imaplib.IMAP4_SSL, message_ids: List[str]) -> Dict[str, str]:
+        """
+        Fetch the bodies of the given Message-IDs from the selected folder, keyed by Message-ID.
+        Each batch of ids takes one UID SEARCH and one UID FETCH, however many emails refer to them.
+        """
+        bodies = {}
+        for start in range(0, len(message_ids), _THREAD_SEARCH_BATCH_SIZE):
+            batch = message_ids[start:start + _THREAD_SEARCH_BATCH_SIZE]
+            # OR is a prefix operator taking two keys: OR OR a b c matches any of a, b, c
+            search_criteria = "OR " * (len(batch) - 1) + " ".join(f'HEADER MESSAGE-ID "{mid}"' for mid in batch)
+            result, data = mail.uid("SEARCH", None, search_criteria)
+            if result != "OK" or not data or not data[0]:
+                continue
+
+            result, msg_data = mail.uid("FETCH", b",".join(data[0].split()), _FETCH_MESSAGE_ITEMS)
+            if result != "OK":
+                continue
+
+            for raw_message in _split_fetch_response(msg_data).values():
+                thread_msg = _parse_message(raw_message)
+                bodies[thread_msg.get("Message-ID", "").strip()] = self._extract_body(thread_msg)
+        return bodies
+
+    def _get_thread_messages(self, msg, thread_bodies: Dict[str, str]) -> List[str]:
+        """
+        Get all messages in the thread by following References and In-Reply-To headers.
+        Bodies are looked up in thread_bodies (keyed by Message-ID), which is filled beforehand
+        by _fetch_thread_bodies for all emails of the run.
+        """
+        return [thread_bodies[mid] for mid in self._referenced_message_ids(msg) if mid in thread_bodies]
+
+    @staticmethod
+    def _decode_part(part) -> str:
+        """Decode a MIME part's payload with its declared charset, replacing undecodable bytes."""
+        payload = part.get_payload(decode=True)
+        if not payload:
+            return ""
+        charset = part.get_content_charset() or 'utf-8'
+        try:
+            return payload.decode(charset, errors='replace')
+        except LookupError:
+            # Unknown charset name
+            return payload.decode('utf-8', errors='replace')
 
     def _extract_body(self, msg) -> str:
         """Extract body from an email message."""
         body = ""
         if msg.is_multipart():
+            # Prefer the plain text parts; the HTML ones are usually the same content again,
+            # so they are only decoded and cleaned when there is no plain text at all
+            plain_parts, html_parts = [], []
             for part in msg.walk():
                 content_type = part.get_content_type()
-                content_disposition = str(part.get("Content-Disposition"))
+                if content_type not in ("text/plain", "text/html"):
+                    continue
+                if "attachment" in str(part.get("Content-Disposition")):
+                    continue
 
-                try:
-                    email_body = part.get_payload(decode=True).decode()
-                except:
-                    email_body = ""
-
-                if content_type == "text/plain" and "attachment" not in content_disposition:
-                    body += email_body
-                elif content_type == "text/html" and "attachment" not in content_disposition:
-                    body += clean_email_body(email_body)
+                if content_type == "text/plain":
+                    plain_parts.append(self._decode_part(part))
+                elif not plain_parts:
+                    html_parts.append(part)
+
+            if plain_parts:
+                body = "".join(plain_parts)
+            else:
+                body = "".join(clean_email_body(self._decode_part(part)) for part in html_parts)
         else:
             try:
-                body = clean_email_body(msg.get_payload(decode=True).decode())
+                body = clean_email_body(self._decode_part(msg), msg.get_content_type())
             except Exception as e:
                 body = f"Error decoding body: {e}"
         return body
@@ -145,6 +396,11 @@ class GetUnreadEmailsSchema(BaseModel):
         description="Maximum number of unread emails to retrieve. Defaults to 5.",
         ge=1  # Ensures the limit is greater than or equal to 1
     )
+    max_workers: Optional[int] = Field(
+        default=1,
+        description="Number of parallel IMAP connections used to fetch the emails. Defaults to 1.",
+        ge=1
+    )
 
 class GetUnreadEmailsTool(GmailToolBase):
     """Tool to get unread emails from Gmail."""
@@ -152,12 +408,60 @@ class GetUnreadEmailsTool(GmailToolBase):
     description: str = "Gets unread emails from Gmail"
     args_schema: Type[BaseModel] = GetUnreadEmailsSchema
     
-    def _run(self, limit: Optional[int] = 5) -> List[Tuple[str, str, str, str, Dict]]:
+    def _fetch_raw_emails(self, mail: imaplib.IMAP4_SSL, email_ids: List[bytes]) -> Dict[bytes, bytes]:
+        """Fetch the raw messages for the given UIDs over an existing connection, one UID FETCH per batch."""
+        raw_by_id = {}
+        # Batches keep each command below Gmail's maximum request size
+        for start in range(0, len(email_ids), _FETCH_BATCH_SIZE):
+            batch = email_ids[start:start + _FETCH_BATCH_SIZE]
+            result, msg_data = mail.uid("FETCH", b",".join(batch), _FETCH_MESSAGE_ITEMS)
+            if result != "OK":
+                print(f"Error fetching emails {batch}:", result)
+                continue
+            raw_by_id.update(_split_fetch_response(msg_data))
+        return raw_by_id
+
+    def _fetch_raw_emails_concurrently(self, batches: List[List[bytes]], max_workers: int) -> Dict[bytes, bytes]:
+        """Fetch FETCH-sized batches of messages in parallel, each worker using its own IMAP connection."""
+        def _fetch_chunk(chunk: List[bytes]) -> Dict[bytes, bytes]:
+            mail = self._connect()
+            try:
+                mail.select("INBOX")
+                return self._fetch_raw_emails(mail, chunk)
+            finally:
+                self._disconnect(mail)
+
+        raw_by_id = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for chunk_result in executor.map(_fetch_chunk, batches):
+                raw_by_id.update(chunk_result)
+        return raw_by_id
+
+    def mark_seen(self, email_ids: List[str]) -> None:
+        """
+        Mark the given UIDs as read, one UID STORE per batch. Fetching uses BODY.PEEK, so emails
+        stay unread until a run has processed them and the next search no longer returns them.
+        """
+        if not email_ids:
+            return
+        mail = self._connect()
+        try:
+            mail.select("INBOX")
+            for start in range(0, len(email_ids), _FETCH_BATCH_SIZE):
+                batch = email_ids[start:start + _FETCH_BATCH_SIZE]
+                result, _ = mail.uid("STORE", ",".join(batch), '+FLAGS', '(\\Seen)')
+                if result != "OK":
+                    print(f"Error marking emails {batch} as read:", result)
+        finally:
+            self._disconnect(mail)
+
+    def _run(self, limit: Optional[int] = 5, max_workers: Optional[int] = 1) -> List[Tuple[str, str, str, str, Dict]]:
         mail = self._connect()
         try:
             print("DEBUG: Connecting to Gmail...")
             mail.select("INBOX")
-            result, data = mail.search(None, 'UNSEEN')
+            # UIDs, unlike sequence numbers, do not shift when another crew moves an email out of the inbox
+            result, data = mail.uid("SEARCH", None, 'UNSEEN')
             
             print(f"DEBUG: Search result: {result}")
             
@@ -176,16 +480,17 @@ class GetUnreadEmailsTool(GmailToolBase):
             email_ids = email_ids[:limit]
             print(f"DEBUG: Processing {len(email_ids)} emails")
             
-            emails = []
-            for i, email_id in enumerate(email_ids):
-                print(f"DEBUG: Processing email {i+1}/{len(email_ids)}")
-                result, msg_data = mail.fetch(email_id, "(RFC822)")
-                if result != "OK":
-                    print(f"Error fetching email {email_id}:", result)
-                    continue
-
-                raw_email = msg_data[0][1]
-                msg = email.message_from_bytes(raw_email)
+            # One FETCH covers a whole batch, so extra connections only pay off beyond one batch
+            batches = [email_ids[i:i + _FETCH_BATCH_SIZE] for i in range(0, len(email_ids), _FETCH_BATCH_SIZE)]
+            workers = max(1, min(max_workers or 1, len(batches)))
+            if workers > 1:
+                print(f"DEBUG: Fetching emails over {workers} connections")
+                raw_by_id = self._fetch_raw_emails_concurrently(batches, workers)
+            else:
+                raw_by_id = self._fetch_raw_emails(mail, email_ids)
+            
+            def _parse_one(email_id: bytes):
+                msg = _parse_message(raw_by_id[email_id])
 
                 # Decode headers properly (handles encoded characters)
                 subject = decode_header_safe(msg["Subject"])
@@ -196,10 +501,34 @@ class GetUnreadEmailsTool(GmailToolBase):
                 received_date = self._parse_email_date(date_str)
                 
                 # Get the current message body
-                current_body = self._extract_body(msg)
-                
+                return email_id, msg, subject, sender, date_str, received_date, self._extract_body(msg)
+
+            # Parsing is independent per email and mostly spent in the C-level HTML parsers,
+            # so it is spread over threads; map keeps the results in email_ids order
+            fetched_ids = [email_id for email_id in email_ids if email_id in raw_by_id]
+            print(f"DEBUG: Processing {len(fetched_ids)} fetched emails")
+            parse_workers = max(1, min(8, os.cpu_count() or 1, len(fetched_ids)))
+            if parse_workers > 1:
+                with ThreadPoolExecutor(max_workers=parse_workers) as executor:
+                    parsed = list(executor.map(_parse_one, fetched_ids))
+            else:
+                parsed = [_parse_one(email_id) for email_id in fetched_ids]
+            
+            # Thread message bodies by Message-ID; replies to emails of this batch need no lookup
+            thread_bodies = {msg.get("Message-ID", "").strip(): body for _, msg, *_, body in parsed}
+            needed_ids = list(dict.fromkeys(
+                mid for _, msg, *_ in parsed
+                for mid in self._referenced_message_ids(msg)
+                if mid not in thread_bodies
+            ))
+            if needed_ids:
+                print(f"DEBUG: Fetching {len(needed_ids)} thread messages")
+                thread_bodies.update(self._fetch_thread_bodies(mail, needed_ids))
+            
+            emails = []
+            for email_id, msg, subject, sender, date_str, received_date, current_body in parsed:
                 # Get thread messages
-                thread_messages = self._get_thread_messages(mail, msg)
+                thread_messages = self._get_thread_messages(msg, thread_bodies)
                 
                 # Combine current message with thread history
                 full_body = "\n\n--- Previous Messages ---\n".join([current_body] + thread_messages)
@@ -240,10 +569,16 @@ class GetUnreadEmailsTool(GmailToolBase):
         if not date_str:
             return ""
         
+        # Fast path for the shape almost every Gmail Date header has: "Tue, 16 Jan 2024 10:04:25 -0800"
+        try:
+            return datetime.strptime(date_str, _EMAIL_DATE_FORMAT).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+        
         try:
             # Try various date formats commonly found in emails
             # Remove timezone name if present (like 'EDT', 'PST')
-            date_str = re.sub(r'\s+\([A-Z]{3,4}\)', '', date_str)
+            date_str = _TZNAME_RE.sub('', date_str)
             
             # Parse with email.utils
             parsed_date = email.utils.parsedate_to_datetime(date_str)
@@ -261,45 +596,26 @@ class SaveDraftSchema(BaseModel):
     recipient: str = Field(..., description="Recipient email address")
     thread_info: Optional[Dict[str, Any]] = Field(None, description="Thread information for replies")
 
-class SaveDraftTool(BaseTool):
+class SaveDraftTool(GmailToolBase):
     """Tool to save an email as a draft using IMAP."""
     name: str = "save_email_draft"
     description: str = "Saves an email as a draft in Gmail"
     args_schema: Type[BaseModel] = SaveDraftSchema
 
+    # Drafts folder name that last selected successfully, tried first on the next save
+    _drafts_folder: ClassVar[Optional[str]] = None
+
     def _format_body(self, body: str) -> str:
         """Format the email body with signature."""
-        # Replace [Your name] or [Your Name] with Tony Kipkemboi
-        body = re.sub(r'\[Your [Nn]ame\]', 'Tony Kipkemboi', body)
+        # Replace [Your name] (any case) with Tony Kipkemboi
+        body, replaced = _SIG_RE.subn('Tony Kipkemboi', body)
         
         # If no placeholder was found, append the signature
-        if '[Your' not in body and '[your' not in body:
+        if not replaced:
             body = f"{body}\n\nBest regards,\nTony Kipkemboi"
         
         return body
 
-    def _connect(self):
-        """Connect to Gmail using IMAP."""
-        # Get email credentials from environment
-        email_address = os.environ.get('EMAIL_ADDRESS')
-        app_password = os.environ.get('APP_PASSWORD')
-        
-        if not email_address or not app_password:
-            raise ValueError("EMAIL_ADDRESS or APP_PASSWORD environment variables not set")
-        
-        # Connect to Gmail's IMAP server
-        mail = imaplib.IMAP4_SSL('imap.gmail.com')
-        print(f"Connecting to Gmail with email: {email_address[:3]}...{email_address[-10:]}")
-        mail.login(email_address, app_password)
-        return mail, email_address
-
-    def _disconnect(self, mail):
-        """Disconnect from Gmail."""
-        try:
-            mail.logout()
-        except:
-            pass
-
     def _check_drafts_folder(self, mail):
         """Check available mailboxes to find the drafts folder."""
         print("Checking available mailboxes...")
@@ -313,6 +629,34 @@ class SaveDraftTool(BaseTool):
             return drafts_folders
         return []
 
+    def _select_drafts_folder(self, mail) -> Optional[str]:
+        """Select the drafts folder, trying the one cached by a previous save first."""
+        candidates = ['"[Gmail]/Drafts"', '[Gmail]/Drafts', 'Drafts']
+        cached = type(self)._drafts_folder
+        if cached is not None:
+            candidates = [cached] + [folder for folder in candidates if folder != cached]
+        
+        for drafts_folder in candidates:
+            print(f"Selecting drafts folder: {drafts_folder}")
+            result, _ = mail.select(drafts_folder)
+            if result == 'OK':
+                type(self)._drafts_folder = drafts_folder
+                return drafts_folder
+        return None
+
+    @staticmethod
+    def _append_uid(mail, data) -> Optional[str]:
+        """UID of the appended draft from the APPEND response's [APPENDUID <uidvalidity> <uid>] code."""
+        # The code is normally part of the tagged OK text; imaplib keeps untagged codes without the name
+        _, untagged = mail.response('APPENDUID')
+        responses = [r for r in data or [] if isinstance(r, bytes)]
+        responses += [b'APPENDUID ' + r for r in untagged or [] if isinstance(r, bytes)]
+        for response in responses:
+            match = _APPENDUID_RE.search(response)
+            if match:
+                return match.group(2).decode()
+        return None
+
     def _verify_draft_saved(self, mail, subject, recipient):
         """Verify if the draft was actually saved by searching for it."""
         try:
@@ -353,30 +697,14 @@ class SaveDraftTool(BaseTool):
 
     def _run(self, subject: str, body: str, recipient: str, thread_info: Optional[Dict[str, Any]] = None) -> str:
         try:
-            mail, email_address = self._connect()
-            
-            # Check available drafts folders
-            drafts_folders = self._check_drafts_folder(mail)
-            print(f"Available drafts folders: {drafts_folders}")
-            
-            # Try with quoted folder name first
-            drafts_folder = '"[Gmail]/Drafts"'
-            print(f"Selecting drafts folder: {drafts_folder}")
-            result, _ = mail.select(drafts_folder)
-            
-            # If that fails, try without quotes
-            if result != 'OK':
-                drafts_folder = '[Gmail]/Drafts'
-                print(f"First attempt failed. Trying: {drafts_folder}")
-                result, _ = mail.select(drafts_folder)
-                
-            # If that also fails, try just 'Drafts'
-            if result != 'OK':
-                drafts_folder = 'Drafts'
-                print(f"Second attempt failed. Trying: {drafts_folder}")
-                result, _ = mail.select(drafts_folder)
-                
-            if result != 'OK':
+            mail = self._connect()
+        except Exception as e:
+            return f"Error saving draft: {str(e)}"
+        try:
+            drafts_folder = self._select_drafts_folder(mail)
+            if drafts_folder is None:
+                # Check available drafts folders
+                drafts_folders = self._check_drafts_folder(mail)
                 return f"Error: Could not select drafts folder. Available folders: {drafts_folders}"
                 
             print(f"Successfully selected drafts folder: {drafts_folder}")
@@ -386,7 +714,7 @@ class SaveDraftTool(BaseTool):
             
             # Create the email message
             message = email.message.EmailMessage()
-            message["From"] = email_address
+            message["From"] = self.email_address
             message["To"] = recipient
             message["Subject"] = subject
             message.set_content(body_with_signature)
@@ -424,7 +752,14 @@ class SaveDraftTool(BaseTool):
                 
             print(f"Draft save attempt result: {result}")
             
-            # Verify the draft was actually saved
+            # With UIDPLUS the APPEND response already identifies the saved draft
+            draft_uid = self._append_uid(mail, data)
+            if draft_uid is not None:
+                return f"VERIFIED: Draft email saved with subject: '{subject}' in folder {drafts_folder} (UID {draft_uid})"
+            if 'UIDPLUS' in mail.capabilities:
+                return f"Draft email saved with subject: '{subject}' in folder {drafts_folder}"
+            
+            # Otherwise verify the draft was actually saved by looking for it
             verified, folder = self._verify_draft_saved(mail, subject, recipient)
             
             if verified:
@@ -448,7 +783,7 @@ class SaveDraftTool(BaseTool):
 
 class GmailOrganizeSchema(BaseModel):
     """Schema for GmailOrganizeTool input."""
-    email_id: str = Field(..., description="Email ID to organize")
+    email_id: str = Field(..., description="Email ID (IMAP UID) to organize")
     category: str = Field(..., description="Category assigned by agent (Urgent/Response Needed/etc)")
     priority: str = Field(..., description="Priority level (High/Medium/Low)")
     should_star: bool = Field(default=False, description="Whether to star the email")
@@ -474,28 +809,23 @@ class GmailOrganizeTool(GmailToolBase):
             mail.select("INBOX")
             
             # Apply organization based on category and priority
+            system_labels = []
             if category == "Urgent Response Needed" and priority == "High":
                 # Star the email
                 if should_star:
-                    mail.store(email_id, '+FLAGS', '\\Flagged')
+                    mail.uid("STORE", email_id, '+FLAGS', '(\\Flagged)')
                 
-                # Mark as important
-                mail.store(email_id, '+FLAGS', '\\Important')
+                # Mark as important; this is a Gmail system label, not an IMAP flag
+                system_labels.append('\\Important')
                 
                 # Apply URGENT label if it doesn't exist
                 if "URGENT" not in labels:
                     labels.append("URGENT")
 
-            # Apply all specified labels
-            for label in labels:
-                try:
-                    # Create label if it doesn't exist
-                    mail.create(label)
-                except:
-                    pass  # Label might already exist
-                
-                # Apply label
-                mail.store(email_id, '+X-GM-LABELS', label)
+            # Apply all specified labels in one STORE; Gmail creates missing labels itself
+            if labels or system_labels:
+                quoted = ['"' + label.replace('\\', '\\\\').replace('"', '\\"') + '"' for label in labels]
+                mail.uid("STORE", email_id, '+X-GM-LABELS', '(' + ' '.join(system_labels + quoted) + ')')
 
             return f"Email organized: Starred={should_star}, Labels={labels}"
 
@@ -506,10 +836,10 @@ class GmailOrganizeTool(GmailToolBase):
 
 class GmailDeleteSchema(BaseModel):
     """Schema for GmailDeleteTool input."""
-    email_id: str = Field(..., description="Email ID to delete")
+    email_id: str = Field(..., description="Email ID (IMAP UID) to delete")
     reason: str = Field(..., description="Reason for deletion")
 
-class GmailDeleteTool(BaseTool):
+class GmailDeleteTool(GmailToolBase):
     """Tool to delete an email using IMAP."""
     name: str = "delete_email"
     description: str = "Deletes an email from Gmail"
@@ -518,7 +848,7 @@ class GmailDeleteTool(BaseTool):
         """
         Delete an email by ID.
         Parameters:
-            email_id: The email ID to delete
+            email_id: The UID of the email to delete
             reason: The reason for deletion (for logging)
         """
         try:
@@ -534,17 +864,19 @@ class GmailDeleteTool(BaseTool):
                 mail.select("INBOX")
                 
                 # First verify the email exists and get its details for logging
-                result, data = mail.fetch(email_id, "(RFC822)")
-                if result != "OK" or not data or data[0] is None:
+                result, data = mail.uid("FETCH", email_id, "(BODY.PEEK[HEADER])")
+                # Unsolicited responses can precede the header literal, so take the first tuple
+                header = next((item[1] for item in data or [] if isinstance(item, tuple)), None)
+                if result != "OK" or header is None:
                     return f"Error: Email with ID {email_id} not found"
                     
-                msg = email.message_from_bytes(data[0][1])
+                msg = _header_parser.parsebytes(header)
                 subject = decode_header_safe(msg["Subject"])
                 sender = decode_header_safe(msg["From"])
                 
                 # Move to Trash
-                mail.store(email_id, '+X-GM-LABELS', '\\Trash')
-                mail.store(email_id, '-X-GM-LABELS', '\\Inbox')
+                mail.uid("STORE", email_id, '+X-GM-LABELS', '\\Trash')
+                mail.uid("STORE", email_id, '-X-GM-LABELS', '\\Inbox')
                 
                 return f"Email deleted: '{subject}' from {sender}. Reason: {reason}"
             except Exception as e:
@@ -555,38 +887,21 @@ class GmailDeleteTool(BaseTool):
         except Exception as e:
             return f"Error deleting email: {str(e)}"
 
-class EmptyTrashTool(BaseTool):
+class EmptyTrashTool(GmailToolBase):
     """Tool to empty Gmail trash."""
     name: str = "empty_gmail_trash"
     description: str = "Empties the Gmail trash folder to free up space"
 
-    def _connect(self):
-        """Connect to Gmail using IMAP."""
-        # Get email credentials from environment
-        email_address = os.environ.get('EMAIL_ADDRESS')
-        app_password = os.environ.get('APP_PASSWORD')
-        
-        if not email_address or not app_password:
-            raise ValueError("EMAIL_ADDRESS or APP_PASSWORD environment variables not set")
-        
-        # Connect to Gmail's IMAP server
-        mail = imaplib.IMAP4_SSL('imap.gmail.com')
-        print(f"Connecting to Gmail with email: {email_address[:3]}...{email_address[-10:]}")
-        mail.login(email_address, app_password)
-        return mail
+    # Trash folder name that last selected successfully, tried first on the next run
+    _trash_folder: ClassVar[Optional[str]] = None
 
-    def _disconnect(self, mail):
-        """Disconnect from Gmail."""
-        try:
-            mail.logout()
-        except:
-            pass
-    
     def _run(self) -> str:
         """Empty the Gmail trash folder."""
         try:
             mail = self._connect()
-            
+        except Exception as e:
+            return f"Error emptying trash: {str(e)}"
+        try:
             # Try different trash folder names (Gmail can have different naming conventions)
             trash_folders = [
                 '"[Gmail]/Trash"',
@@ -595,6 +910,9 @@ class EmptyTrashTool(BaseTool):
                 '"[Google Mail]/Trash"',
                 '[Google Mail]/Trash'
             ]
+            cached = type(self)._trash_folder
+            if cached is not None:
+                trash_folders = [cached] + [folder for folder in trash_folders if folder != cached]
             
             success = False
             trash_folder_used = None
@@ -606,10 +924,11 @@ class EmptyTrashTool(BaseTool):
                     
                     if result == 'OK':
                         trash_folder_used = folder
+                        type(self)._trash_folder = folder
                         print(f"Successfully selected trash folder: {folder}")
                         
-                        # Search for all messages in trash
-                        result, data = mail.search(None, 'ALL')
+                        # Search for all messages in trash; by UID, since another crew may expunge concurrently
+                        result, data = mail.uid("SEARCH", None, 'ALL')
                         
                         if result == 'OK':
                             email_ids = data[0].split()
@@ -621,9 +940,12 @@ class EmptyTrashTool(BaseTool):
                             
                             print(f"Found {count} messages in trash.")
                             
-                            # Delete all messages in trash
-                            for email_id in email_ids:
-                                mail.store(email_id, '+FLAGS', '\\Deleted')
+                            # Delete all messages in trash with a single STORE over the whole folder
+                            result, _ = mail.store(b'1:*', '+FLAGS', '\\Deleted')
+                            if result != 'OK':
+                                print(f"Bulk delete returned {result}, deleting messages one by one")
+                                for email_id in email_ids:
+                                    mail.uid("STORE", email_id, '+FLAGS', '\\Deleted')
                             
                             # Permanently remove messages marked for deletion
                             mail.expunge()
@@ -1,10 +1,155 @@
 import os
-import json
-import requests
-from typing import List, Dict, Optional, Type
-from pydantic import BaseModel, Field
+import random
+import asyncio
+import atexit
+import functools
+import gzip
+import hashlib
+import logging
+import socket
+import ssl
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+import anyio
+import certifi
+import httpx
+import orjson
+from typing import Any, List, Dict, Optional, Set, Tuple, Type, ClassVar
+from pydantic import BaseModel, Field, PrivateAttr, TypeAdapter
 from crewai.tools import BaseTool
 
+logger = logging.getLogger(__name__)
+
+# Timeouts in seconds for webhook requests
+_SLACK_TIMEOUT = httpx.Timeout(10.0, connect=3.05)
+# HTTP/2 multiplexes concurrent posts over one connection, so a few connections are plenty
+_SLACK_MAX_CONNECTIONS = 4
+# Disable Nagle for the small posts and keep idle sockets alive
+_SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+# One TLS context for every Slack connection of the process, sync and async: the CA bundle
+# is loaded once and the context's session cache is shared by all clients
+_SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+_SSL_CONTEXT.minimum_version = ssl.TLSVersion.TLSv1_2
+_SSL_CONTEXT.set_alpn_protocols(["h2", "http/1.1"])
+# Slack accepts at most this many blocks in one message
+_SLACK_MAX_BLOCKS = 50
+_JSON_HEADERS = {"Content-Type": "application/json"}
+_GZIP_JSON_HEADERS = {**_JSON_HEADERS, "Content-Encoding": "gzip"}
+# Retries of rate-limited (429) and failed (5xx) posts, with exponential backoff
+_MAX_RETRIES = 5
+_BACKOFF_FACTOR = 0.3
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Errors raised before the request went out; after any other error Slack may already have
+# posted the message, so retrying it could post it twice
+_UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Longest Retry-After honoured, in seconds; the batch tool waits while holding its buffer lock
+_MAX_RETRY_AFTER = 5.0
+# Failure reasons for the expected network errors, returned without formatting the exception
+_TIMEOUT_ERROR = "timed out waiting for Slack"
+_CONNECTION_ERROR = "could not connect to Slack"
+_UNEXPECTED_ERROR = "unexpected error, see the log"
+# Priority names, lowest first, for the SLACK_MIN_PRIORITY threshold
+_PRIORITY_LEVELS = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+# Identical notifications within this many seconds are only sent once
+_DEDUPE_TTL = 300
+_DEDUPE_MAX_ENTRIES = 1024
+
+# Invariant parts of the notification blocks, built once; the divider is never mutated,
+# so every message shares the same dict
+_DIVIDER_BLOCK = {"type": "divider"}
+
+# Slack's mrkdwn control characters; escaping them keeps e.g. "Name <a@b.c>" senders intact
+_MRKDWN_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+def _escape_mrkdwn(text: str) -> str:
+    """Escape text for a mrkdwn block (plain_text blocks need no escaping)."""
+    return str(text).translate(_MRKDWN_ESCAPE)
+
+def _mrkdwn_section(text: str) -> Dict:
+    """A section block with a single mrkdwn text."""
+    return {"type": "section", "text": {"type": "mrkdwn", "text": text}}
+
+def _slack_limits() -> httpx.Limits:
+    """
+    Connection limits for the Slack clients. Slack closes idle webhook sockets, and reusing
+    one costs a failed request plus a new handshake, so idle connections are dropped after
+    SLACK_KEEPALIVE_EXPIRY seconds (default 10). SLACK_DISABLE_POOL=1 disables reuse entirely.
+    """
+    if os.getenv("SLACK_DISABLE_POOL") == "1":
+        return httpx.Limits(max_connections=_SLACK_MAX_CONNECTIONS, max_keepalive_connections=0)
+    return httpx.Limits(
+        max_connections=_SLACK_MAX_CONNECTIONS,
+        max_keepalive_connections=_SLACK_MAX_CONNECTIONS,
+        keepalive_expiry=float(os.getenv("SLACK_KEEPALIVE_EXPIRY", "10")),
+    )
+
+def _encode_body(body: bytes) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Request content and headers for a JSON body. Bodies of at least SLACK_GZIP_MIN_BYTES are
+    gzip-compressed (fastest level, for bandwidth rather than ratio); unset means never.
+    """
+    min_bytes = os.getenv("SLACK_GZIP_MIN_BYTES")
+    if min_bytes and len(body) >= int(min_bytes):
+        return gzip.compress(body, compresslevel=1), _GZIP_JSON_HEADERS
+    return body, _JSON_HEADERS
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry number attempt + 1, honouring Slack's Retry-After up to _MAX_RETRY_AFTER."""
+    if retry_after:
+        try:
+            return min(max(0.0, float(retry_after)), _MAX_RETRY_AFTER)
+        except ValueError:
+            pass
+    return _BACKOFF_FACTOR * (2 ** attempt) + random.uniform(0, _BACKOFF_FACTOR)
+
+def _wrap_blocks(rendered_blocks: List[bytes]) -> bytes:
+    """Join serialized block lists into the JSON body of one Slack message."""
+    return b'{"blocks":[' + b",".join(rendered_blocks) + b"]}"
+
+@functools.lru_cache(maxsize=None)
+def _webhook_url() -> Tuple[str, httpx.URL]:
+    """
+    SLACK_WEBHOOK_URL and its parsed form, read and validated once for all tool instances.
+    Read on first use rather than at import, since main.run() loads the .env file after the
+    tools are imported; a missing or malformed URL raises and is not cached.
+    """
+    url = os.environ.get("SLACK_WEBHOOK_URL")
+    if not url:
+        raise ValueError("SLACK_WEBHOOK_URL must be set in the environment.")
+    parsed = httpx.URL(url)
+    if parsed.scheme != "https" or not parsed.host:
+        raise ValueError(f"SLACK_WEBHOOK_URL must be an https URL, got: {url}")
+    return url, parsed
+
+# Notifications are posted by background workers; _inflight holds the ones not sent yet
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="slack")
+_inflight: Set[Future] = set()
+_inflight_lock = threading.Lock()
+
+def _notification_done(future: Future) -> None:
+    """Report the outcome of a background notification."""
+    with _inflight_lock:
+        _inflight.discard(future)
+    try:
+        print(future.result())
+    except Exception as e:
+        print(f"Error sending Slack notification: {e}")
+
+@atexit.register
+def _drain_notifications() -> None:
+    """Wait for the queued notifications and close the client before the process exits."""
+    with _inflight_lock:
+        pending = list(_inflight)
+    wait(pending)
+    _executor.shutdown(wait=True)
+    if SlackNotificationTool._client is not None:
+        SlackNotificationTool._client.close()
+
 class SlackNotificationSchema(BaseModel):
     """Schema for SlackNotificationTool input."""
     subject: str = Field(..., description="Email subject")
@@ -17,93 +162,329 @@ class SlackNotificationSchema(BaseModel):
     intro: Optional[str] = Field(None, description="Custom intro phrase for the notification")
     action_header: Optional[str] = Field(None, description="Custom header for the action section")
 
+# Validator for send_many's items, compiled once at import; validates the whole list in one call
+_NOTIFICATIONS_ADAPTER = TypeAdapter(List[SlackNotificationSchema])
+
 class SlackNotificationTool(BaseTool):
     """Tool to send notifications to Slack."""
     name: str = "slack_notification"
     description: str = "Sends notifications about important emails to Slack"
     args_schema: Type[BaseModel] = SlackNotificationSchema
     
+    # HTTP/2 clients shared by all instances, so notifications reuse the TLS connection;
+    # the async one is bound to the event loop it was created in
+    _client: ClassVar[Optional[httpx.Client]] = None
+    _client_lock: ClassVar[threading.Lock] = threading.Lock()
+    _aclient: ClassVar[Optional[httpx.AsyncClient]] = None
+    _aclient_loop: ClassVar[Optional[asyncio.AbstractEventLoop]] = None
+    # When each recent notification was sent, keyed by a hash of its content; shared by all
+    # instances so a retried or re-run notification is not posted twice
+    _recent: ClassVar["OrderedDict[bytes, float]"] = OrderedDict()
+    _recent_lock: ClassVar[threading.Lock] = threading.Lock()
+    
     class Config:
         arbitrary_types_allowed = True
     
-    def __init__(self):
-        super().__init__()
-        self._webhook_url = os.environ.get("SLACK_WEBHOOK_URL")
-        if not self._webhook_url:
-            raise ValueError("SLACK_WEBHOOK_URL must be set in the environment.")
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._webhook_url, self._parsed_webhook_url = _webhook_url()
+        # Notifications below SLACK_MIN_PRIORITY (low/medium/high/critical, default low) are not sent
+        self._min_priority = _PRIORITY_LEVELS.get(os.getenv("SLACK_MIN_PRIORITY", "low").strip().lower(), 0)
 
-    def _run(self, subject: str, sender: str, category: str, 
-             priority: str, summary: str, action_needed: Optional[str] = None,
-             headline: Optional[str] = None, intro: Optional[str] = None,
-             action_header: Optional[str] = None) -> str:
-        """Send a notification to Slack."""
+    @staticmethod
+    def _get_client() -> httpx.Client:
+        """The sync client shared by all Slack tools, created on first use."""
+        with SlackNotificationTool._client_lock:
+            if SlackNotificationTool._client is None:
+                transport = httpx.HTTPTransport(
+                    http2=True, limits=_slack_limits(), socket_options=_SOCKET_OPTIONS, verify=_SSL_CONTEXT
+                )
+                SlackNotificationTool._client = httpx.Client(transport=transport, timeout=_SLACK_TIMEOUT)
+            return SlackNotificationTool._client
+
+    @staticmethod
+    def _get_async_client() -> httpx.AsyncClient:
+        """The async client of the running event loop shared by all Slack tools, created on first use."""
+        loop = asyncio.get_running_loop()
+        # An AsyncClient's connections belong to the loop that opened them
+        if SlackNotificationTool._aclient is None or SlackNotificationTool._aclient_loop is not loop:
+            transport = httpx.AsyncHTTPTransport(
+                http2=True, limits=_slack_limits(), socket_options=_SOCKET_OPTIONS, verify=_SSL_CONTEXT
+            )
+            SlackNotificationTool._aclient = httpx.AsyncClient(transport=transport, timeout=_SLACK_TIMEOUT)
+            SlackNotificationTool._aclient_loop = loop
+        return SlackNotificationTool._aclient
+
+    def _below_threshold(self, priority: str) -> bool:
+        """Whether a priority is below SLACK_MIN_PRIORITY; unknown priorities are never skipped."""
+        return _PRIORITY_LEVELS.get(str(priority).strip().lower(), self._min_priority) < self._min_priority
+
+    @staticmethod
+    def _build_payload(subject: str, sender: str, category: str, 
+                       priority: str, summary: str, action_needed: Optional[str] = None,
+                       headline: Optional[str] = None, intro: Optional[str] = None,
+                       action_header: Optional[str] = None) -> Dict:
+        """Build the Slack message payload for an email notification."""
         
-        # Format the message
+        # Format the message; only the text differs between notifications
         blocks = [
-            {
-                "type": "header",
-                "text": {
-                    "type": "plain_text",
-                    "text": headline or f"Important Email: {subject}"
-                }
-            }
+            {"type": "header", "text": {"type": "plain_text", "text": headline or f"Important Email: {subject}"}}
         ]
         
         # Add intro if provided
         if intro:
-            blocks.append({
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"*{intro}*"
-                }
-            })
+            blocks.append(_mrkdwn_section(f"*{_escape_mrkdwn(intro)}*"))
         
         # Add email details
         blocks.append({
             "type": "section",
             "fields": [
-                {"type": "mrkdwn", "text": f"*From:*\n{sender}"},
-                {"type": "mrkdwn", "text": f"*Category:*\n{category}"},
-                {"type": "mrkdwn", "text": f"*Priority:*\n{priority}"},
+                {"type": "mrkdwn", "text": f"*From:*\n{_escape_mrkdwn(sender)}"},
+                {"type": "mrkdwn", "text": f"*Category:*\n{_escape_mrkdwn(category)}"},
+                {"type": "mrkdwn", "text": f"*Priority:*\n{_escape_mrkdwn(priority)}"},
             ]
         })
         
         # Add summary
-        blocks.append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"*Summary:*\n{summary}"
-            }
-        })
+        blocks.append(_mrkdwn_section(f"*Summary:*\n{_escape_mrkdwn(summary)}"))
         
         # Add action needed if provided
         if action_needed:
-            blocks.append({
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"*{action_header or 'Action Needed:'}*\n{action_needed}"
-                }
-            })
+            action_title = _escape_mrkdwn(action_header or 'Action Needed:')
+            blocks.append(_mrkdwn_section(f"*{action_title}*\n{_escape_mrkdwn(action_needed)}"))
         
         # Add divider
-        blocks.append({"type": "divider"})
+        blocks.append(_DIVIDER_BLOCK)
+        
+        return {"blocks": blocks}
+
+    @classmethod
+    def _render_blocks(cls, *args, **kwargs) -> Tuple[int, bytes]:
+        """Number of blocks and their serialized JSON (without the enclosing brackets)."""
+        blocks = cls._build_payload(*args, **kwargs)["blocks"]
+        return len(blocks), orjson.dumps(blocks)[1:-1]
+
+    def render(self, subject: str, sender: str, category: str, 
+               priority: str, summary: str, action_needed: Optional[str] = None,
+               headline: Optional[str] = None, intro: Optional[str] = None,
+               action_header: Optional[str] = None) -> bytes:
+        """Serialize a notification to the JSON body posted to the webhook, once per notification."""
+        _, blocks_json = self._render_blocks(subject, sender, category, priority, summary,
+                                             action_needed, headline, intro, action_header)
+        return _wrap_blocks([blocks_json])
+
+    @classmethod
+    def _is_duplicate(cls, rendered: bytes) -> bool:
+        """Whether the same rendered notification was already sent within the last _DEDUPE_TTL seconds."""
+        key = hashlib.blake2b(rendered, digest_size=16).digest()
+        now = time.monotonic()
+        with cls._recent_lock:
+            sent_at = cls._recent.get(key)
+            if sent_at is not None and now - sent_at < _DEDUPE_TTL:
+                return True
+            cls._recent[key] = now
+            cls._recent.move_to_end(key)
+            while len(cls._recent) > _DEDUPE_MAX_ENTRIES:
+                cls._recent.popitem(last=False)
+        return False
+
+    @classmethod
+    def _forget(cls, rendered: bytes) -> None:
+        """Drop the dedupe entry of a notification that failed to send, so a retry goes out."""
+        key = hashlib.blake2b(rendered, digest_size=16).digest()
+        with cls._recent_lock:
+            cls._recent.pop(key, None)
+
+    def _post(self, body: bytes) -> httpx.Response:
+        """
+        POST an already serialized JSON body to the webhook, retrying 429/5xx and connection
+        failures with backoff; errors after the request was sent are not retried.
+        """
+        client = self._get_client()
+        content, headers = _encode_body(body)
+        for attempt in range(_MAX_RETRIES + 1):
+            try:
+                response = client.post(self._parsed_webhook_url, content=content, headers=headers)
+            except _UNSENT_ERRORS:
+                if attempt == _MAX_RETRIES:
+                    raise
+                time.sleep(_retry_delay(attempt))
+                continue
+            if response.status_code not in _RETRY_STATUSES or attempt == _MAX_RETRIES:
+                break
+            time.sleep(_retry_delay(attempt, response.headers.get("Retry-After")))
+        response.raise_for_status()
+        return response
+
+    async def _apost(self, body: bytes) -> httpx.Response:
+        """Async _post; waits between retries without blocking the event loop."""
+        client = self._get_async_client()
+        content, headers = _encode_body(body)
+        for attempt in range(_MAX_RETRIES + 1):
+            try:
+                response = await client.post(self._parsed_webhook_url, content=content, headers=headers)
+            except _UNSENT_ERRORS:
+                if attempt == _MAX_RETRIES:
+                    raise
+                await asyncio.sleep(_retry_delay(attempt))
+                continue
+            if response.status_code not in _RETRY_STATUSES or attempt == _MAX_RETRIES:
+                break
+            await asyncio.sleep(_retry_delay(attempt, response.headers.get("Retry-After")))
+        response.raise_for_status()
+        return response
+
+    def _run(self, subject: str, sender: str, category: str, 
+             priority: str, summary: str, action_needed: Optional[str] = None,
+             headline: Optional[str] = None, intro: Optional[str] = None,
+             action_header: Optional[str] = None) -> str:
+        """Queue a notification for Slack; it is sent in the background."""
+        if self._below_threshold(priority):
+            return f"Slack notification for email: {subject} skipped: below threshold"
+        body = self.render(subject, sender, category, priority, summary,
+                           action_needed, headline, intro, action_header)
+        if self._is_duplicate(body):
+            return f"Slack notification for email: {subject} was already sent recently, skipped"
         
-        # Prepare the payload
-        payload = {
-            "blocks": blocks
-        }
+        # Send the notification without holding up the agent
+        future = _executor.submit(self.send, body, subject)
+        with _inflight_lock:
+            _inflight.add(future)
+        future.add_done_callback(_notification_done)
+        return f"Slack notification queued for email: {subject}"
+
+    def send(self, body: bytes, subject: str) -> str:
+        """Send a rendered notification to Slack and describe the outcome; retries reuse the same body."""
+        error = self._send_body(body)
+        if error:
+            self._forget(body)
+            return f"Error sending Slack notification: {error}"
+        return f"Slack notification sent successfully for email: {subject}"
+
+    def _send_body(self, body: bytes) -> Optional[str]:
+        """Post a body to the webhook; returns None on success, or a short reason on failure."""
+        try:
+            self._post(body)
+            return None
+        except httpx.TimeoutException:
+            return _TIMEOUT_ERROR
+        except httpx.HTTPStatusError as e:
+            return f"HTTP {e.response.status_code} from Slack"
+        except httpx.TransportError:
+            return _CONNECTION_ERROR
+        except Exception:
+            logger.exception("Unexpected error sending Slack notification")
+            return _UNEXPECTED_ERROR
+
+    async def _arun(self, subject: str, sender: str, category: str, 
+                    priority: str, summary: str, action_needed: Optional[str] = None,
+                    headline: Optional[str] = None, intro: Optional[str] = None,
+                    action_header: Optional[str] = None) -> str:
+        """Send a notification to Slack without blocking the event loop."""
+        if self._below_threshold(priority):
+            return f"Slack notification for email: {subject} skipped: below threshold"
+        body = self.render(subject, sender, category, priority, summary,
+                           action_needed, headline, intro, action_header)
+        if self._is_duplicate(body):
+            return f"Slack notification for email: {subject} was already sent recently, skipped"
         
         # Send the notification
         try:
-            response = requests.post(
-                self._webhook_url,
-                data=json.dumps(payload),
-                headers={"Content-Type": "application/json"}
-            )
-            response.raise_for_status()
+            await self._apost(body)
             return f"Slack notification sent successfully for email: {subject}"
-        except Exception as e:
-            return f"Error sending Slack notification: {e}" 
\ No newline at end of file
+        except httpx.TimeoutException:
+            error = _TIMEOUT_ERROR
+        except httpx.HTTPStatusError as e:
+            error = f"HTTP {e.response.status_code} from Slack"
+        except httpx.TransportError:
+            error = _CONNECTION_ERROR
+        except Exception:
+            logger.exception("Unexpected error sending Slack notification")
+            error = _UNEXPECTED_ERROR
+        self._forget(body)
+        return f"Error sending Slack notification: {error}"
+
+
+    async def send_many(self, items: List[Dict[str, Any]]) -> List[str]:
+        """
+        Send several notifications concurrently over the shared HTTP/2 connection.
+        Each item holds SlackNotificationSchema fields; results are returned in item order.
+        Raises pydantic.ValidationError before anything is sent if an item is invalid.
+        """
+        notifications = _NOTIFICATIONS_ADAPTER.validate_python(items)
+        results: List[Optional[str]] = [None] * len(notifications)
+
+        async def _send_one(index: int, notification: SlackNotificationSchema) -> None:
+            # Already validated, so the fields are passed on as they are, without a model_dump
+            results[index] = await self._arun(**dict(notification))
+
+        async with anyio.create_task_group() as task_group:
+            for index, notification in enumerate(notifications):
+                task_group.start_soon(_send_one, index, notification)
+        return results
+
+class SlackBatchNotificationTool(SlackNotificationTool):
+    """Tool that collects notifications and sends them to Slack as one message per batch."""
+    description: str = "Sends notifications about important emails to Slack, batched into as few messages as possible"
+    batch_size: int = Field(_SLACK_MAX_BLOCKS, description="Maximum number of blocks per Slack message")
+    batch_interval: float = Field(5.0, description="Seconds after which a pending batch is sent with the next notification")
+
+    # Rendered blocks of each pending notification, with their block count
+    _buffer: List[Tuple[int, bytes]] = PrivateAttr(default_factory=list)
+    _flush_deadline: Optional[float] = PrivateAttr(default=None)
+    _buffer_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def _run(self, subject: str, sender: str, category: str, 
+             priority: str, summary: str, action_needed: Optional[str] = None,
+             headline: Optional[str] = None, intro: Optional[str] = None,
+             action_header: Optional[str] = None) -> str:
+        """Add a notification to the pending batch, sending the batch when it is full or due."""
+        if self._below_threshold(priority):
+            return f"Slack notification for email: {subject} skipped: below threshold"
+        block_count, blocks_json = self._render_blocks(subject, sender, category, priority, summary,
+                                                       action_needed, headline, intro, action_header)
+        if self._is_duplicate(blocks_json):
+            return f"Slack notification for email: {subject} was already sent recently, skipped"
+        
+        with self._buffer_lock:
+            results = []
+            # Slack rejects messages with more blocks than that, so send what we have first
+            if self._buffer and self._buffered_blocks() + block_count > self.batch_size:
+                results.append(self._flush_locked())
+            
+            self._buffer.append((block_count, blocks_json))
+            if self._flush_deadline is None:
+                self._flush_deadline = time.monotonic() + self.batch_interval
+            
+            if self._buffered_blocks() >= self.batch_size or time.monotonic() > self._flush_deadline:
+                results.append(self._flush_locked())
+        
+        status = "; ".join(results) if results else "queued for the next batch"
+        return f"Slack notification for email: {subject} ({status})"
+
+    async def _arun(self, *args, **kwargs) -> str:
+        """Add a notification to the pending batch without blocking the event loop."""
+        return await asyncio.to_thread(self._run, *args, **kwargs)
+
+    def flush(self) -> str:
+        """Send all pending notifications now; the crew calls this at the end of the run."""
+        with self._buffer_lock:
+            if not self._buffer:
+                return "No pending Slack notifications"
+            return self._flush_locked()
+
+    def _buffered_blocks(self) -> int:
+        return sum(block_count for block_count, _ in self._buffer)
+
+    def _flush_locked(self) -> str:
+        """Post the pending notifications as one message; the caller holds _buffer_lock."""
+        pending = [blocks_json for _, blocks_json in self._buffer]
+        body = _wrap_blocks(pending)
+        self._buffer.clear()
+        self._flush_deadline = None
+        error = self._send_body(body)
+        if error:
+            for blocks_json in pending:
+                self._forget(blocks_json)
+            return f"Error sending Slack notifications: {error}"
+        return f"sent {len(pending)} notifications to Slack in one message"
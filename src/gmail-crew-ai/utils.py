@@ -0,0 +1,14 @@
+import functools
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+import orjson
+
+@functools.lru_cache(maxsize=4)
+def _load_emails(path: str, mtime: float) -> List[Dict[str, Any]]:
+    """Parse a fetched emails file. The mtime argument invalidates the cache when the file changes."""
+    return orjson.loads(Path(path).read_bytes())
+
+def load_fetched_emails(path: str) -> List[Dict[str, Any]]:
+    """Load a fetched emails JSON file, parsing it only once per change of the file."""
+    return _load_emails(path, os.path.getmtime(path))